@@ -6,11 +6,12 @@ import time
 import os
 
 class CaptureWindow:
-    def __init__(self, root, save_dir, quality, callback):
+    def __init__(self, root, save_dir, quality, callback, profiler=None):
         self.root = root
         self.save_dir = save_dir
         self.quality = quality
         self.callback = callback # キャプチャ完了時に呼び出す関数
+        self.profiler = profiler # 計測フェーズを通知するプロファイラ (任意)
 
         self.top = tk.Toplevel(root)
         self.top.attributes("-fullscreen", True)
@@ -65,6 +66,9 @@ class CaptureWindow:
         # self.bg_photo = ImageTk.PhotoImage(self.bg_image)
         # self.canvas.create_image(0, 0, anchor=tk.NW, image=self.bg_photo)
 
+        if self.profiler: # オーバーレイの表示完了。ドラッグ中は計測しない
+            self.profiler.end_overlay()
+
     def on_button_press(self, event):
         self.start_x = self.canvas.winfo_pointerx()
         self.start_y = self.canvas.winfo_pointery()
@@ -82,6 +86,8 @@ class CaptureWindow:
         self.canvas.coords(self.rect, self.start_x, self.start_y, cur_x, cur_y)
 
     def on_button_release(self, event):
+        if self.profiler: # ここから保存までを計測
+            self.profiler.begin_save()
         end_x = self.canvas.winfo_pointerx()
         end_y = self.canvas.winfo_pointery()
         self.top.destroy() # キャプチャウィンドウを閉じる
@@ -127,14 +133,14 @@ class CaptureWindow:
         self.callback(None) # キャンセル
 
 
-def start_capture(root, save_dir, quality, callback):
+def start_capture(root, save_dir, quality, callback, profiler=None):
     # 既存のCaptureWindowがあれば破棄（念のため）
     for widget in root.winfo_children():
         if isinstance(widget, tk.Toplevel) and hasattr(widget, 'is_capture_window'):
             widget.destroy()
 
     # キャプチャウィンドウ作成
-    cap_win = CaptureWindow(root, save_dir, quality, callback)
+    cap_win = CaptureWindow(root, save_dir, quality, callback, profiler)
     cap_win.top.is_capture_window = True # 目印
 
 
@@ -12,6 +12,7 @@ import argparse # コマンドライン引数解析用にインポート
 # 他の自作モジュールをインポート
 from settings_gui import SettingsWindow, load_config, get_save_directory, get_jpeg_quality, get_hotkey
 from capture_tool import start_capture
+from profiler import CaptureProfiler, DEFAULT_PROFILE_CYCLES
 
 CONFIG_FILE = 'config.ini'
 
@@ -23,6 +24,7 @@ capture_in_progress = False # キャプチャ中のフラグ
 root = None # Tkinterのルートウィンドウ
 icon = None # pystrayのアイコンオブジェクト
 settings_win = None # 設定ウィンドウのインスタンス
+capture_profiler = CaptureProfiler() # キャプチャ処理のプロファイラ (無効時は何もしない)
 
 # --- タスクトレイアイコン関連 ---
 def create_image(width, height, color1, color2):
@@ -53,6 +55,29 @@ def open_settings():
     
     print("設定ウィンドウが閉じられました。")
 
+def toggle_profiling(icon_obj, item):
+    global root
+    # cProfileはメインスレッドで有効化する必要があるため、root.afterで切り替える
+    if root:
+        try:
+            root.after(0, _toggle_and_refresh)
+        except tk.TclError as e:
+            print(f"Tkinter afterスケジューリングエラー: {e}")
+
+def _toggle_and_refresh():
+    # pystrayはメニュー操作の直後にメニューを再構築するが、その時点ではまだ切り替わっていないため、
+    # 切り替え後にあらためてチェック状態を更新する
+    capture_profiler.toggle()
+    on_profiling_changed()
+
+def on_profiling_changed():
+    # プロファイルの開始・停止 (手動・指定回数での自動停止) 時に、メニューのチェック状態を更新する
+    if icon:
+        try:
+            icon.update_menu()
+        except Exception as e:
+            print(f"メニューの更新中にエラー: {e}")
+
 def exit_action(icon_obj, item): # 引数名をiconからicon_objに変更
     global hotkey_listener, root, icon
     print("アプリケーションを終了します。")
@@ -81,6 +106,7 @@ def setup_tray_icon():
 
     icon_image = create_image(64, 64, 'grey', 'red') # アイコン画像
     menu = (pystray.MenuItem('設定', open_settings),
+            pystray.MenuItem('プロファイル', toggle_profiling, checked=lambda item: capture_profiler.active),
             pystray.MenuItem('終了', exit_action))
     icon = pystray.Icon("ScreenCaptureApp", icon_image, "スクリーンキャプチャ", menu) # グローバル変数 icon に代入
     return icon
@@ -126,16 +152,29 @@ def on_activate():
     def capture_finished_callback(saved_path):
         global capture_in_progress
         capture_in_progress = False # フラグをリセット
+        capture_profiler.end_cycle() # 保存完了 (またはキャンセル) までを1回として計測
         if saved_path:
             print(f"キャプチャ完了: {saved_path}")
         else:
             print("キャプチャ失敗またはキャンセル")
 
+    def begin_capture():
+        global capture_in_progress
+        capture_profiler.begin_cycle() # オーバーレイ表示までを計測 (以降のフェーズは capture_tool から通知)
+        try:
+            start_capture(root, save_dir, quality, capture_finished_callback, capture_profiler)
+        except Exception as e:
+            print(f"キャプチャ画面の作成中にエラーが発生しました: {e}")
+            traceback.print_exc()
+            # コールバックが呼ばれないため、ここで計測を打ち切りフラグを戻す
+            capture_profiler.abort_cycle()
+            capture_in_progress = False
+
     # Tkinterの処理はメインスレッドで行う必要があるため、root.afterを使用
     # rootが確実に存在し、mainloopが実行されている前提
     if root:
         try:
-            root.after(10, lambda: start_capture(root, save_dir, quality, capture_finished_callback))
+            root.after(10, begin_capture)
         except tk.TclError as e:
              print(f"Tkinter afterスケジューリングエラー: {e} (mainloopが実行されていない可能性があります)")
              # mainloopが動いていない場合のエラー処理
@@ -265,7 +304,13 @@ if __name__ == "__main__":
     # コマンドライン引数の解析
     parser = argparse.ArgumentParser(description="スクリーンキャプチャアプリケーション")
     parser.add_argument('--settings', action='store_true', help='起動時に設定画面を表示します')
+    parser.add_argument('--profile', nargs='?', type=int, const=DEFAULT_PROFILE_CYCLES, metavar='N',
+                        help=f'起動時からN回分のキャプチャをプロファイルします (省略時: {DEFAULT_PROFILE_CYCLES}回)')
     args = parser.parse_args()
+    if args.profile is not None and args.profile < 1:
+        parser.error('--profile には1以上の回数を指定してください')
+    if args.profile is not None and args.settings:
+        parser.error('--profile は --settings と同時に指定できません (設定モードではキャプチャを行いません)')
 
     try:
         print("アプリケーションを開始します...")
@@ -296,6 +341,12 @@ if __name__ == "__main__":
                  print("Tkinterの初期化に失敗したため、アプリケーションを起動できません。")
                  exit() # Tkinterがないと動作しないため終了
 
+            # プロファイルモード (メニューのチェック状態に反映させるため、アイコン作成前に開始する)
+            capture_profiler.on_stopped = on_profiling_changed
+            if args.profile is not None:
+                capture_profiler.cycles = args.profile
+                capture_profiler.start()
+
             # タスクトレイアイコンをセットアップ
             tray_icon = setup_tray_icon() # setup_tray_icon内でグローバル変数iconに代入される
 
@@ -329,6 +380,7 @@ if __name__ == "__main__":
 
         # mainloopが終了した or 例外が発生した場合のクリーンアップ
         stop_hotkey_listener() # ホットキーリスナーを停止 (通常モードでのみ意味があるが、呼んでも問題ない)
+        capture_profiler.stop() # 計測途中で終了した場合もそこまでの結果を出力する
 
         if icon and icon.visible: # iconオブジェクトが存在し、表示されている場合のみ停止
              print("タスクトレイアイコンを停止します...")
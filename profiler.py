@@ -0,0 +1,214 @@
+import cProfile
+import pstats
+import tracemalloc
+import io
+import os
+import time
+import traceback
+
+PROFILE_DIR = 'profiles'
+DEFAULT_PROFILE_CYCLES = 5
+TRACEMALLOC_FRAMES = 10 # アロケーション元として保持するスタックの深さ
+REPORT_TOP_FUNCTIONS = 30
+REPORT_TOP_ALLOCATIONS = 20
+
+class CaptureProfiler:
+    """キャプチャ処理を cProfile と tracemalloc で計測し、指定回数分をファイルに出力する。
+
+    1回のキャプチャは次の2つのフェーズに分けて計測し、ユーザーが範囲をドラッグしている間は計測しない。
+      overlay: ホットキー→オーバーレイ表示 (begin_cycle から end_overlay まで)
+      save:    マウスボタン解放→保存 (begin_save から end_cycle まで)
+
+    各メソッドはすべてTkinterのメインスレッドから呼ぶこと。
+    無効時は各メソッドがフラグを確認するだけなのでコストはほぼない。
+    """
+
+    def __init__(self, cycles=DEFAULT_PROFILE_CYCLES, output_dir=PROFILE_DIR):
+        self.cycles = cycles
+        self.output_dir = output_dir
+        self.active = False
+        self.on_stopped = None # 自動停止時に呼び出す関数 (トレイメニューの更新用)
+        self._profile = None
+        self._in_cycle = False
+        self._phase = None # 計測中のフェーズ名 ('overlay' / 'save')。None の間は cProfile 無効
+        self._phase_start = None
+        self._phase_start_size = 0
+        self._cycle = None # 計測中のキャプチャの {フェーズ名: (所要時間[秒], フェーズ開始時からの割り当てピーク[bytes])}
+        self._completed = 0
+        self._cycle_stats = [] # キャプチャごとの self._cycle のリスト
+        self._max_peak = -1
+        self._baseline = None
+        self._peak_snapshot = None # 割り当てピークが最大だったフェーズ終了時のスナップショット
+        self._started_tracemalloc = False
+
+    def start(self):
+        if self.active:
+            return
+        print(f"プロファイルを開始します (対象: {self.cycles} 回のキャプチャ)。")
+        self._profile = cProfile.Profile()
+        self._completed = 0
+        self._cycle_stats = []
+        self._max_peak = -1
+        # 既に PYTHONTRACEMALLOC などで有効な場合は停止しないように記録しておく
+        self._started_tracemalloc = not tracemalloc.is_tracing()
+        if self._started_tracemalloc:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        self._baseline = tracemalloc.take_snapshot()
+        self.active = True
+
+    def stop(self):
+        """計測を終了し、結果を出力する。出力したレポートのパスを返す。"""
+        if not self.active:
+            return None
+        if self._in_cycle: # キャプチャ途中で停止された場合もそこまでの結果を残す
+            self._finish_cycle()
+        self.active = False
+
+        report_path = None
+        try:
+            if self._completed:
+                report_path = self._dump()
+            else:
+                print("計測済みのキャプチャがないため、プロファイルは出力しません。")
+        except Exception as e:
+            print(f"プロファイルの出力中にエラーが発生しました: {e}")
+            traceback.print_exc()
+        finally:
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+            self._profile = None
+            self._baseline = None
+            self._peak_snapshot = None
+        print("プロファイルを停止しました。")
+        return report_path
+
+    def toggle(self):
+        if self.active:
+            self.stop()
+        else:
+            self.start()
+
+    def begin_cycle(self):
+        # ホットキー→オーバーレイ表示のフェーズを開始
+        if not self.active or self._in_cycle:
+            return
+        self._in_cycle = True
+        self._cycle = {}
+        self._begin_phase('overlay')
+
+    def end_overlay(self):
+        # オーバーレイの表示 (背景の取得) が完了した。ドラッグ中は計測しない
+        if self._phase == 'overlay':
+            self._end_phase()
+
+    def begin_save(self):
+        # マウスボタン解放→保存のフェーズを開始
+        if self._in_cycle and self._phase is None:
+            self._begin_phase('save')
+
+    def end_cycle(self):
+        # 保存完了・キャンセル・失敗のいずれでも1回のキャプチャとして記録する
+        if not self._in_cycle:
+            return
+        self._finish_cycle()
+        print(f"プロファイル: {self._completed}/{self.cycles} 回のキャプチャを計測しました。")
+        if self._completed >= self.cycles:
+            self.stop()
+            if self.on_stopped:
+                self.on_stopped()
+
+    def abort_cycle(self):
+        # キャプチャ処理が例外で中断された場合、計測途中のキャプチャを破棄する
+        if not self._in_cycle:
+            return
+        if self._phase is not None:
+            self._profile.disable()
+            self._phase = None
+        self._in_cycle = False
+        self._cycle = None
+        print("プロファイル: キャプチャが中断されたため、このキャプチャの計測を破棄しました。")
+
+    def _begin_phase(self, phase):
+        self._phase = phase
+        tracemalloc.reset_peak()
+        self._phase_start_size = tracemalloc.get_traced_memory()[0]
+        self._phase_start = time.perf_counter()
+        self._profile.enable()
+
+    def _end_phase(self):
+        self._profile.disable()
+        elapsed = time.perf_counter() - self._phase_start
+        peak = tracemalloc.get_traced_memory()[1] - self._phase_start_size
+        # 画像データがまだ解放されていない時点のスナップショットを残す
+        if peak > self._max_peak:
+            self._max_peak = peak
+            self._peak_snapshot = tracemalloc.take_snapshot()
+        self._cycle[self._phase] = (elapsed, peak)
+        self._phase = None
+
+    def _finish_cycle(self):
+        if self._phase is not None:
+            self._end_phase()
+        self._cycle_stats.append(self._cycle)
+        self._cycle = None
+        self._completed += 1
+        self._in_cycle = False
+
+    def _dump(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        ms = int(time.time() * 1000) % 1000
+        base = os.path.join(self.output_dir, f"capture_profile_{timestamp}_{ms:03d}")
+
+        # snakeviz などで開けるように pstats 形式でも保存する
+        prof_path = base + ".prof"
+        self._profile.dump_stats(prof_path)
+
+        report_path = base + ".txt"
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write(self._format_report())
+        print(f"プロファイルを保存しました: {report_path}, {prof_path}")
+        return report_path
+
+    def _format_report(self):
+        out = io.StringIO()
+        out.write(f"計測したキャプチャ回数: {self._completed}\n\n")
+
+        out.write("=== キャプチャごとの所要時間と割り当てピーク (ドラッグ中は含まない) ===\n")
+        out.write(f"{'':5}{'overlay':>27}  {'save':>27}\n")
+        for i, cycle in enumerate(self._cycle_stats, 1):
+            cells = []
+            for phase in ('overlay', 'save'):
+                if phase in cycle:
+                    elapsed, peak = cycle[phase]
+                    cells.append(f"{elapsed * 1000:10.1f} ms  {peak / 1024 / 1024:8.1f} MiB")
+                else: # キャンセルなどでフェーズが実行されなかった
+                    cells.append(f"{'-':>27}")
+            out.write(f"{i:3d}: " + "  ".join(cells) + "\n")
+        out.write("\n")
+
+        out.write("=== CPU (累積時間順) ===\n")
+        stats = pstats.Stats(self._profile, stream=out)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(REPORT_TOP_FUNCTIONS)
+
+        out.write("=== CPU (関数内時間順) ===\n")
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(REPORT_TOP_FUNCTIONS)
+
+        out.write("=== 計測開始時からのメモリ割り当て増加 (ピーク最大のフェーズ終了時, 上位) ===\n")
+        filters = (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        )
+        snapshot = self._peak_snapshot.filter_traces(filters)
+        baseline = self._baseline.filter_traces(filters)
+        for stat in snapshot.compare_to(baseline, 'lineno')[:REPORT_TOP_ALLOCATIONS]:
+            out.write(f"{stat}\n")
+        out.write("\n")
+
+        out.write("=== 同時点のメモリ割り当て (スタック別上位) ===\n")
+        for stat in snapshot.statistics('traceback')[:REPORT_TOP_ALLOCATIONS]:
+            out.write(f"{stat.count} blocks, {stat.size / 1024:.1f} KiB\n")
+            for line in stat.traceback.format():
+                out.write(f"  {line}\n")
+        return out.getvalue()